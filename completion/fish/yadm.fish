@@ -2,7 +2,8 @@
 
 function __fish_yadm_universial_optspecs
     string join \n 'a-yadm-dir=' 'b-yadm-repo=' 'c-yadm-config=' \
-                    'd-yadm-encrypt=' 'e-yadm-archive=' 'f-yadm-bootstrap='
+                    'd-yadm-encrypt=' 'e-yadm-archive=' 'f-yadm-bootstrap=' \
+                    'g-timings' 'h-timings-json='
 end
 
 function __fish_yadm_needs_command
@@ -35,6 +36,8 @@ complete -x -c yadm -n '__fish_yadm_using_command clone' -l bootstrap    -d 'for
 complete -x -c yadm -n '__fish_yadm_using_command clone' -l no-bootstrap -d 'prevent bootstrap from beingrun'
 
 complete -x -c yadm -n '__fish_yadm_needs_command' -a 'alt'       -d 'Create links for alternates'
+complete -x -c yadm -n '__fish_yadm_using_command alt' -s f -l force -d 'process alternates even if nothing changed'
+complete -x -c yadm -n '__fish_yadm_using_command alt' -l plan -d 'print the actions to be taken, without taking them'
 complete -x -c yadm -n '__fish_yadm_needs_command' -a 'bootstrap' -d 'Execute $HOME/.config/yadm/bootstrap'
 complete -x -c yadm -n '__fish_yadm_needs_command' -a 'perms'     -d 'Fix perms for private files'
 complete -x -c yadm -n '__fish_yadm_needs_command' -a 'enter'     -d 'Run sub-shell with GIT variables set'
@@ -51,11 +54,12 @@ complete -x -c yadm -n '__fish_yadm_needs_command' -a 'list' -d 'List tracked fi
 complete -x -c yadm -n '__fish_yadm_using_command list' -s a -d 'list all managed files instead'
 
 complete -x -c yadm -n '__fish_yadm_needs_command' -a 'encrypt' -d 'Encrypt files'
+complete -x -c yadm -n '__fish_yadm_using_command encrypt' -s f -l force -d 'encrypt even if nothing changed'
 complete -x -c yadm -n '__fish_yadm_needs_command' -a 'decrypt' -d 'Decrypt files'
 complete -x -c yadm -n '__fish_yadm_using_command decrypt' -s l -d 'list the files stored without extracting'
 
 complete -x -c yadm -n '__fish_yadm_needs_command' -a 'introspect' -d 'Report internal yadm data'
-complete -x -c yadm -n '__fish_yadm_using_command introspect' -a (printf -- '%s\n' 'commands configs repo switches') -d 'category'
+complete -x -c yadm -n '__fish_yadm_using_command introspect' -a (printf -- '%s\n' 'commands configs repo switches system') -d 'category'
 
 complete -x -c yadm -n '__fish_yadm_needs_command' -a 'gitconfig' -d 'Pass options to the git config command'
 complete -x -c yadm -n '__fish_yadm_needs_command' -a 'config'    -d 'Configure a setting'
@@ -70,6 +74,8 @@ complete --force-files -c yadm      -l yadm-config    -d 'Override location of y
 complete --force-files -c yadm      -l yadm-encrypt   -d 'Override location of yadm encryption configuration'
 complete --force-files -c yadm      -l yadm-archive   -d 'Override location of yadm encrypted files archive'
 complete --force-files -c yadm      -l yadm-bootstrap -d 'Override location of yadm bootstrap program'
+complete -f -c yadm                 -l timings        -d 'Report the time spent in each phase'
+complete --force-files -c yadm      -l timings-json   -d 'Write the time spent in each phase as JSON'
 
 # wraps git's autocomplete
 set -l GIT_DIR (yadm introspect repo)
@@ -144,11 +144,17 @@ def supported_configs():
         "local.os",
         "local.user",
         "yadm.alt-copy",
+        "yadm.alt-jobs",
+        "yadm.alt-renderer",
+        "yadm.archive-compression",
+        "yadm.archive-format",
+        "yadm.archive-shards",
         "yadm.auto-alt",
         "yadm.auto-exclude",
         "yadm.auto-perms",
         "yadm.auto-private-dirs",
         "yadm.cipher",
+        "yadm.encrypt-prune",
         "yadm.git-program",
         "yadm.gpg-perms",
         "yadm.gpg-program",
@@ -156,6 +162,7 @@ def supported_configs():
         "yadm.openssl-ciphername",
         "yadm.openssl-old",
         "yadm.openssl-program",
+        "yadm.read-only-commands",
         "yadm.ssh-perms",
         "yadm.template-read-only",
     ]
@@ -175,6 +182,8 @@ def supported_switches():
         "--yadm-dir",
         "--yadm-encrypt",
         "--yadm-repo",
+        "--timings",
+        "--timings-json",
         "-Y",
     ]
 
@@ -180,7 +180,7 @@ def test_auto_alt(runner, yadm_cmd, paths, autoalt):
         os.system(" ".join(yadm_cmd("config", "yadm.auto-alt", autoalt)))
 
     utils.create_alt_files(paths, "##default")
-    run = runner(yadm_cmd("status"))
+    run = runner(yadm_cmd("checkout"))
     assert run.success
     assert run.err == ""
     linked = utils.parse_alt_output(run.out)
@@ -202,6 +202,38 @@ def test_auto_alt(runner, yadm_cmd, paths, autoalt):
                 assert str(paths.work.join(source_file)) not in linked
 
 
+@pytest.mark.usefixtures("ds1_copy")
+def test_auto_alt_config(runner, paths):
+    """Automatic alt uses the yadm configuration written by a Git command"""
+
+    yadm_dir, yadm_data = setup_standard_yadm_dir(paths)
+    config = yadm_dir.join("config")
+    config.write("[yadm]\n\tauto-alt = false\n")
+    utils.create_alt_files(paths, "##default")
+    git_env = {"GIT_DIR": str(paths.repo), "GIT_WORK_TREE": str(paths.work)}
+    assert runner(command=("git", "add", str(config)), env=git_env).success
+    config.remove()
+
+    run = runner([paths.pgm, "-Y", yadm_dir, "--yadm-data", yadm_data, "checkout", "--", config])
+    assert run.success
+    assert run.err == ""
+    assert config.isfile()
+    for link_path in TEST_PATHS:
+        assert not paths.work.join(link_path).exists()
+
+
+@pytest.mark.usefixtures("ds1_copy")
+def test_auto_alt_read_only(runner, yadm_cmd, paths):
+    """Read-only commands don't process alternates"""
+
+    utils.create_alt_files(paths, "##default")
+    run = runner(yadm_cmd("status"))
+    assert run.success
+    assert run.err == ""
+    for link_path in TEST_PATHS:
+        assert not paths.work.join(link_path).exists()
+
+
 @pytest.mark.usefixtures("ds1_copy")
 def test_stale_link_removal(runner, yadm_cmd, paths):
     """Stale links to alternative files are removed
@@ -317,6 +349,232 @@ def test_template_readonly(runner, yadm_cmd, paths, readonly):
             assert write_perm_mask == 0
 
 
+@pytest.mark.usefixtures("ds1_copy")
+@pytest.mark.parametrize("force", [None, "-f", "--force"])
+def test_alt_cache(runner, yadm_cmd, paths, force):
+    """Skip alternate processing when its inputs are unchanged
+
+    The alt cache records the inputs and the targets of the last run. Unless
+    forced, alt is not processed again while those inputs are unchanged and
+    the targets are still in place.
+    """
+
+    utils.create_alt_files(paths, "##default")
+    run = runner(yadm_cmd("alt"))
+    assert run.success
+    assert run.err == ""
+    assert paths.data.join("alt-cache").isfile()
+
+    args = ["alt", force] if force else ["alt"]
+    run = runner(yadm_cmd(*args, "-d"))
+    assert run.success
+    assert run.err == ""
+    assert ("Alternates are unchanged since the last run" in run.out) == (not force)
+
+    # a missing link is planned and restored
+    link = paths.work.join(utils.ALT_FILE1)
+    source = paths.work.join(utils.ALT_FILE1 + "##default")
+    assert link.islink()
+    link.remove()
+    run = runner(yadm_cmd("alt", "--plan"))
+    assert run.success
+    assert f"link\t{link}\t{source}\n" in run.out
+    assert not link.exists()
+
+    run = runner(yadm_cmd(*args))
+    assert run.success
+    assert run.err == ""
+    assert link.islink()
+    assert str(source) in run.out
+    if not force:
+        # only the missing link was processed
+        assert str(paths.work.join(utils.ALT_FILE2 + "##default")) not in run.out
+
+    # changing an input invalidates the cache
+    utils.set_local(paths, "class", "changedclass")
+    run = runner(yadm_cmd("alt", "-d"))
+    assert run.success
+    assert "Alternates are unchanged since the last run" not in run.out
+
+
+@pytest.mark.usefixtures("ds1_repo_copy")
+def test_alt_cache_includes(runner, yadm_cmd, paths):
+    """Process templates again when a file they include is modified"""
+
+    include = paths.work.join("cache_include")
+    include.write("first")
+    template = paths.work.join("cache_template##template")
+    template.write('{% include "cache_include" %}')
+    output = paths.work.join("cache_template")
+
+    run = runner(yadm_cmd("add", template))
+    assert run.success
+    assert output.read() == "first\n"
+
+    include.write("second")
+    os.utime(include, (1, 1))
+    run = runner(yadm_cmd("alt"))
+    assert run.success
+    assert run.err == ""
+    assert output.read() == "second\n"
+
+    # unchanged includes keep using the cache, a missing output is rendered
+    run = runner(yadm_cmd("alt", "-d"))
+    assert run.success
+    assert "Alternates are unchanged since the last run" in run.out
+    output.remove()
+    run = runner(yadm_cmd("alt"))
+    assert run.success
+    assert output.read() == "second\n"
+
+
+@pytest.mark.usefixtures("ds1_copy")
+def test_alt_incremental(runner, yadm_cmd, paths):
+    """Only process alternates affected by changes to the repo
+
+    After an initial run, only the targets of alternates which have been
+    added, changed or removed since the last run are processed.
+    """
+
+    utils.create_alt_files(paths, "##default")
+    run = runner(yadm_cmd("alt"))
+    assert run.success
+
+    # this link is only reported if all alternates are processed
+    untouched = paths.work.join(utils.ALT_FILE2)
+    assert untouched.islink()
+    unchanged = f"Link {untouched} is unchanged"
+
+    git_env = {"GIT_DIR": str(paths.repo), "GIT_WORK_TREE": str(paths.work)}
+    added = paths.work.join("incremental_alt##default")
+    added.write("incremental_alt")
+    run = runner(command=("git", "add", str(added)), env=git_env)
+    assert run.success
+    run = runner(yadm_cmd("alt", "-d"))
+    assert run.success
+    assert run.err == ""
+    assert "Processing alternates (incremental)" in run.out
+    assert paths.work.join("incremental_alt").islink()
+    assert unchanged not in run.out
+
+    run = runner(command=("git", "rm", "--cached", "-q", str(added)), env=git_env)
+    assert run.success
+    run = runner(yadm_cmd("alt", "-d"))
+    assert run.success
+    assert run.err == ""
+    assert not paths.work.join("incremental_alt").exists()
+    assert unchanged not in run.out
+
+    run = runner(yadm_cmd("alt", "-f", "-d"))
+    assert run.success
+    assert unchanged in run.out
+
+
+@pytest.mark.usefixtures("ds1_copy")
+def test_alt_plan(runner, yadm_cmd, paths):
+    """Print the plan without changing files, and keep unchanged links"""
+
+    utils.create_alt_files(paths, "##default")
+    link = paths.work.join(utils.ALT_FILE1)
+    source = paths.work.join(utils.ALT_FILE1 + "##default")
+
+    run = runner(yadm_cmd("alt", "--plan"))
+    assert run.success
+    assert run.err == ""
+    assert f"link\t{link}\t{source}\n" in run.out
+    for line in run.out.splitlines():
+        assert line.split("\t")[0] in ("mkdir", "link")
+    assert not link.exists()
+
+    run = runner(yadm_cmd("alt"))
+    assert run.success
+    assert link.islink()
+    inode = os.lstat(link).st_ino
+
+    run = runner(yadm_cmd("alt", "--plan", "--force"))
+    assert run.success
+    assert run.err == ""
+    assert f"keep\t{link}\t{source}\n" in run.out
+    assert "link\t" not in run.out
+
+    run = runner(yadm_cmd("alt", "--force"))
+    assert run.success
+    assert str(source) not in run.out
+    assert os.lstat(link).st_ino == inode
+
+
+@pytest.mark.usefixtures("ds1_copy")
+def test_alt_newline(runner, yadm_cmd, paths):
+    """Alternates may have a newline in their name"""
+
+    source = paths.work.join("new\nline##default")
+    source.write("newline")
+    run = runner(yadm_cmd("add", str(source)))
+    assert run.success
+    assert run.err == ""
+    assert paths.work.join("new\nline").islink()
+    assert paths.work.join("new\nline").read() == "newline"
+
+
+@pytest.mark.usefixtures("ds1_copy")
+def test_alt_config_first(runner, paths):
+    """Link the yadm configuration before processing templates"""
+
+    yadm_dir, yadm_data = setup_standard_yadm_dir(paths)
+    config = yadm_dir.join("config##default")
+    config.write("[yadm]\n\tauto-perms = false\n")
+    template = paths.work.join("config_copy##template")
+    template.write('{% include ".config/yadm/config" %}')
+
+    run = runner([paths.pgm, "-Y", yadm_dir, "--yadm-data", yadm_data, "add", config, template])
+    assert run.success
+    assert run.err == ""
+    assert yadm_dir.join("config").islink()
+    assert paths.work.join("config_copy").read() == config.read()
+
+
+@pytest.mark.usefixtures("ds1_repo_copy")
+def test_template_cache(runner, yadm_cmd, paths):
+    """Reuse cached template output while the template's inputs are unchanged"""
+
+    include = paths.work.join("cache_include")
+    include.write("first")
+    template = paths.work.join("cache_template##template")
+    template.write('{{yadm.user}}\n{% include "cache_include" %}')
+    output = paths.work.join("cache_template")
+
+    run = runner(yadm_cmd("add", template))
+    assert run.success
+    assert output.read().endswith("first\n")
+
+    # cached outputs are only accessible by the user
+    cache = paths.data.join("template-cache")
+    assert oct(cache.stat().mode & 0o777) == oct(0o700)
+    for cached in cache.listdir():
+        assert oct(cached.stat().mode & 0o777) == oct(0o600)
+
+    run = runner(yadm_cmd("alt", "-f", "-d"))
+    assert run.success
+    assert run.err == ""
+    assert f"Template cache hit for {template}" in run.out
+    assert output.read().endswith("first\n")
+
+    # changing an included file changes the key of the template
+    include.write("second")
+    run = runner(yadm_cmd("alt", "-f", "-d"))
+    assert run.success
+    assert run.err == ""
+    assert f"Template cache miss for {template}" in run.out
+    assert output.read().endswith("second\n")
+
+    # outputs of templates which are no longer tracked are pruned
+    runner(yadm_cmd("rm", "--cached", "-q", template))
+    assert paths.data.join("template-cache").listdir()
+    run = runner(yadm_cmd("alt", "-f"))
+    assert run.success
+    assert not paths.data.join("template-cache").listdir()
+
+
 def setup_standard_yadm_dir(paths):
     """Configure a yadm home within the work tree"""
     std_yadm_dir = paths.work.mkdir(".config").mkdir("yadm")
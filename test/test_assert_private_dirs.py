@@ -29,11 +29,10 @@ def test_pdirs_missing(runner, yadm_cmd, paths, home):
     if home:
         env["HOME"] = paths.work
 
-    # run status
-    run = runner(command=yadm_cmd("status"), env=env)
+    # run checkout
+    run = runner(command=yadm_cmd("checkout"), env=env)
     assert run.success
     assert run.err == ""
-    assert "On branch master" in run.out
 
     # confirm directories are created
     # and are protected
@@ -48,7 +47,7 @@ def test_pdirs_missing(runner, yadm_cmd, paths, home):
     # confirm directories are created before command is run:
     if home:
         assert re.search(
-            r"Creating.+\.(gnupg|ssh).+Creating.+\.(gnupg|ssh).+Running git command git status", run.out, re.DOTALL
+            r"Creating.+\.(gnupg|ssh).+Creating.+\.(gnupg|ssh).+Running git command git checkout", run.out, re.DOTALL
         ), "directories created before command is run"
 
 
@@ -71,11 +70,10 @@ def test_pdirs_missing_apd_false(runner, yadm_cmd, paths):
     # set configuration
     os.system(" ".join(yadm_cmd("config", "--bool", "yadm.auto-private-dirs", "false")))
 
-    # run status
-    run = runner(command=yadm_cmd("status"))
+    # run checkout
+    run = runner(command=yadm_cmd("checkout"))
     assert run.success
     assert run.err == ""
-    assert "On branch master" in run.out
 
     # confirm directories are STILL missing
     for pdir in PRIVATE_DIRS:
@@ -102,13 +100,44 @@ def test_pdirs_exist_apd_false(runner, yadm_cmd, paths):
     # set configuration
     os.system(" ".join(yadm_cmd("config", "--bool", "yadm.auto-perms", "false")))
 
-    # run status
-    run = runner(command=yadm_cmd("status"))
+    # run checkout
+    run = runner(command=yadm_cmd("checkout"))
     assert run.success
     assert run.err == ""
-    assert "On branch master" in run.out
 
     # created directories are STILL permissive
     for pdir in PRIVATE_DIRS:
         path = paths.work.join(pdir)
         assert oct(path.stat().mode).endswith("77"), "Directory is secure"
+
+
+@pytest.mark.parametrize("alias", [False, True], ids=["status", "alias"])
+def test_pdirs_read_only(runner, yadm_cmd, paths, alias):
+    """Private dirs (read-only command)
+
+    When a read-only git command is run
+    And private directories are missing
+    Do not create private dirs
+    """
+
+    # confirm directories are missing at start
+    for pdir in PRIVATE_DIRS:
+        path = paths.work.join(pdir)
+        if path.exists():
+            path.remove()
+        assert not path.exists()
+
+    command = "status"
+    if alias:
+        command = "st"
+        os.system(" ".join(yadm_cmd("gitconfig", "alias.st", "status")))
+        os.system(" ".join(yadm_cmd("config", "yadm.read-only-commands", "'lg st'")))
+
+    run = runner(command=yadm_cmd(command), env={"HOME": paths.work})
+    assert run.success
+    assert run.err == ""
+    assert "On branch master" in run.out
+
+    # confirm directories are STILL missing
+    for pdir in PRIVATE_DIRS:
+        assert not paths.work.join(pdir).exists()
@@ -300,6 +300,27 @@ def successful_clone(run, paths, repo_config, expected_code=0):
     return True
 
 
+@pytest.mark.usefixtures("config_git")
+def test_clone_config(runner, paths, tmpdir):
+    """Automatic actions use the yadm configuration which was cloned"""
+
+    remote = tmpdir.mkdir("config_remote")
+    remote.join(".config/yadm/config").write("[yadm]\n\tauto-alt = false\n", ensure=True)
+    remote.join("alt##default").write("alt")
+    for args in (["init", "-q"], ["add", "."], ["commit", "-q", "-m", "config"]):
+        assert runner(command=["git", *args], cwd=remote).success
+
+    yadm_dir = paths.work.join(".config/yadm")
+    data = paths.root.join("clone_data")
+    run = runner(
+        command=[paths.pgm, "-Y", yadm_dir, "--yadm-data", data, "clone", "--no-bootstrap", remote],
+        env={"HOME": paths.work},
+    )
+    assert run.success
+    assert yadm_dir.join("config").isfile()
+    assert not paths.work.join("alt").exists()
+
+
 @pytest.fixture()
 def remote(paths, ds1_repo_copy):
     """Function scoped remote (based on ds1)"""
@@ -1,5 +1,6 @@
 """Test encryption"""
 
+import collections
 import os
 import shlex
 import time
@@ -55,6 +56,24 @@ def asymmetric_key(runner, gnupg):
     remove_asymmetric_key(runner, gnupg)
 
 
+@pytest.fixture
+def archive_setup(yadm_cmd, paths, gnupg, asymmetric_key):
+    """Fixture for encrypting with the asymmetric key
+
+    Provides the environment to run yadm with, the directory holding the
+    objects or shards of the archive and a function to set configurations.
+    """
+
+    def config(key, value):
+        os.system(" ".join(yadm_cmd("config", key, value)))
+
+    config("yadm.gpg-recipient", asymmetric_key)
+    env = os.environ.copy()
+    env["GNUPGHOME"] = gnupg.home
+    setup = collections.namedtuple("ArchiveSetup", ["env", "objects", "config"])
+    return setup(env, paths.archive.dirpath().join("archive.d"), config)
+
+
 @pytest.fixture
 def encrypt_targets(yadm_cmd, paths):
     """Fixture for setting up data to encrypt
@@ -412,7 +431,7 @@ def test_encrypt_added_to_exclude(runner, yadm_cmd, paths, gnupg):
     assert run.err == ""
 
 
-def encrypted_data_valid(runner, gnupg, encrypted, expected):
+def encrypted_data_valid(runner, gnupg, encrypted, expected, count=None):
     """Verify encrypted data matches expectations"""
     gnupg.pw(PASSPHRASE)
     env = os.environ.copy()
@@ -426,5 +445,351 @@ def encrypted_data_valid(runner, gnupg, encrypted, expected):
             continue
         file_count += 1
         assert filename in expected, f"Unexpected file in archive: {filename}"
-    assert file_count == len(expected), "Number of files in archive does not match expected"
+    if count is None:
+        count = len(expected)
+    assert file_count == count, "Number of files in archive does not match expected"
     return True
+
+
+def test_objects_format(runner, yadm_cmd, paths, archive_setup, encrypt_targets, gnupg):
+    """Test the "objects" archive format"""
+
+    archive_setup.config("yadm.archive-format", "objects")
+
+    def manifest(kind="object"):
+        lines = paths.archive.read().splitlines()
+        assert lines[0] == "yadm-archive objects"
+        return [line.split(" ", 1)[1] for line in lines[1:] if line.startswith(f"{kind} ")]
+
+    def stored():
+        return sorted(manifest() + manifest("index"))
+
+    # every file is encrypted into its own object
+    run = runner(yadm_cmd("encrypt"), env=archive_setup.env)
+    assert run.success
+    assert "Encrypting the following files:" in run.out
+    first = manifest()
+    assert len(first) == len(encrypt_targets)
+    assert len(manifest("index")) == 1
+    assert stored() == sorted(path.basename for path in archive_setup.objects.listdir())
+    cache = paths.archive.dirpath().join("archive-cache")
+    assert oct(cache.stat().mode & 0o777) == oct(0o600)
+    for object_id in first:
+        assert encrypted_data_valid(runner, gnupg, archive_setup.objects.join(object_id), encrypt_targets, 1)
+
+    # unchanged files are not encrypted again
+    mtime = paths.work.join("inc file1").mtime()
+    paths.work.join("inc file1").setmtime(mtime - 10)
+    run = runner(yadm_cmd("encrypt"), env=archive_setup.env)
+    assert run.success
+    assert "Encrypting the following files:" not in run.out
+    assert f"Reusing {len(encrypt_targets)} unchanged files" in run.out
+    assert manifest() == first
+    index = manifest("index")
+
+    # only a changed file gets a new object, the old one is removed
+    paths.work.join("inc file1").write("changed")
+    run = runner(yadm_cmd("encrypt"), env=archive_setup.env)
+    assert run.success
+    assert "Encrypting the following files:\ninc file1\n\n" in run.out
+    second = manifest()
+    assert len(set(first) - set(second)) == 1
+    assert len(set(second) - set(first)) == 1
+    assert manifest("index") != index
+    assert stored() == sorted(path.basename for path in archive_setup.objects.listdir())
+
+    # forcing encrypts all files again
+    run = runner(yadm_cmd("encrypt", "-f"), env=archive_setup.env)
+    assert run.success
+    assert "Reusing" not in run.out
+    assert not set(manifest()) & set(second)
+
+    # decrypt restores all of the files
+    for filename in encrypt_targets:
+        paths.work.join(filename).remove()
+    run = runner(yadm_cmd("decrypt"), env=archive_setup.env)
+    assert run.success
+    assert "All files decrypted." in run.out
+    assert paths.work.join("inc file1").read() == "changed"
+    for filename in encrypt_targets:
+        assert paths.work.join(filename).exists()
+
+
+def test_objects_index(runner, yadm_cmd, paths, archive_setup, encrypt_targets):
+    """Test listing and selective decryption of an "objects" archive"""
+
+    archive_setup.config("yadm.archive-format", "objects")
+    assert runner(yadm_cmd("encrypt"), env=archive_setup.env).success
+
+    # listing only needs the index, so it works without any other object
+    index = [line.split()[1] for line in paths.archive.read().splitlines() if line.startswith("index ")]
+    for path in archive_setup.objects.listdir():
+        if path.basename not in index:
+            path.move(paths.root.join(path.basename))
+    run = runner(yadm_cmd("decrypt", "-l"), env=archive_setup.env)
+    assert run.success
+    for filename in encrypt_targets:
+        assert f"{filename}\n" in run.out
+    for path in paths.root.listdir():
+        if len(path.basename) == 40:
+            path.move(archive_setup.objects.join(path.basename))
+
+    # only the named paths are extracted
+    for filename in encrypt_targets:
+        paths.work.join(filename).remove()
+    run = runner(yadm_cmd("decrypt", "inc file1", "./globs dir/"), env=archive_setup.env)
+    assert run.success
+    assert paths.work.join("inc file1").read() == "inc file1"
+    assert paths.work.join("globs dir/globs file2").read() == "globs file2"
+    assert not paths.work.join("globs file1").exists()
+    assert not paths.work.join("extest/inglob1").exists()
+
+    run = runner(yadm_cmd("decrypt", "missing"), env=archive_setup.env)
+    assert run.failure
+    assert "Not found in" in run.err
+
+
+@pytest.mark.parametrize("recipient", [KEY_NAME, ""], ids=["asymmetric", "symmetric"])
+def test_shards_format(runner, yadm_cmd, paths, archive_setup, encrypt_targets, gnupg, recipient):
+    """Test the "shards" archive format"""
+
+    archive_setup.config("yadm.gpg-recipient", shlex.quote(recipient))
+    archive_setup.config("yadm.archive-format", "shards")
+    archive_setup.config("yadm.archive-shards", "3")
+    gnupg.pw(PASSPHRASE)
+
+    def manifest():
+        lines = paths.archive.read().splitlines()
+        assert lines[0] == "yadm-archive shards"
+        assert ("concurrent" in lines) == bool(recipient)
+        return [line.split(" ", 1)[1] for line in lines[1:] if line.startswith("shard ")]
+
+    # the files are split into shards, together holding all of them
+    run = runner(yadm_cmd("encrypt"), env=archive_setup.env)
+    assert run.success
+    assert "Encrypting the following files into 3 shards:" in run.out
+    first = manifest()
+    assert len(first) == 3
+    assert sorted(first) == sorted(path.basename for path in archive_setup.objects.listdir())
+    members = []
+    for shard in first:
+        gnupg.pw(PASSPHRASE)
+        run = runner(
+            ["gpg", "-d", shlex.quote(str(archive_setup.objects.join(shard))), "2>/dev/null", "|", "tar", "t"],
+            env=archive_setup.env,
+            shell=True,
+            report=False,
+        )
+        members += [name for name in run.out.splitlines() if not name.endswith("/")]
+    assert sorted(members) == sorted(encrypt_targets)
+
+    # shards of the previous archive are removed
+    gnupg.pw(PASSPHRASE)
+    run = runner(yadm_cmd("encrypt", "-f"), env=archive_setup.env)
+    assert run.success
+    second = manifest()
+    assert not set(first) & set(second)
+    assert sorted(second) == sorted(path.basename for path in archive_setup.objects.listdir())
+
+    # listing shows the files of all shards
+    gnupg.pw(PASSPHRASE)
+    run = runner(yadm_cmd("decrypt", "-l"), env=archive_setup.env)
+    assert run.success
+    for filename in encrypt_targets:
+        assert filename in run.out
+
+    # selected paths are not supported
+    run = runner(yadm_cmd("decrypt", "inc file1"), env=archive_setup.env)
+    assert run.failure
+    assert "not supported" in run.err
+
+    # decrypt restores all of the files
+    for filename in encrypt_targets:
+        paths.work.join(filename).remove()
+    gnupg.pw(PASSPHRASE)
+    run = runner(yadm_cmd("decrypt"), env=archive_setup.env)
+    assert run.success
+    assert "All files decrypted." in run.out
+    for filename in encrypt_targets:
+        assert paths.work.join(filename).exists()
+
+
+def test_tar_selective_decrypt(runner, yadm_cmd, paths, archive_setup, encrypt_targets):
+    """Test decrypting some paths of a "tar" archive"""
+
+    assert runner(yadm_cmd("encrypt"), env=archive_setup.env).success
+
+    for filename in encrypt_targets:
+        paths.work.join(filename).remove()
+    run = runner(yadm_cmd("decrypt", "extest/inglob1"), env=archive_setup.env)
+    assert run.success
+    assert paths.work.join("extest/inglob1").read() == "inglob1"
+    assert not paths.work.join("inc file1").exists()
+
+
+@pytest.mark.usefixtures("encrypt_targets")
+def test_tar_replaces_objects(runner, yadm_cmd, archive_setup):
+    """Test removing the objects of a previous archive when encrypting a tar"""
+
+    # a directory which isn't part of an archive is left alone
+    unrelated = archive_setup.objects.join("unrelated")
+    unrelated.write("unrelated", ensure=True)
+    assert runner(yadm_cmd("encrypt"), env=archive_setup.env).success
+    assert unrelated.isfile()
+
+    archive_setup.config("yadm.archive-format", "objects")
+    assert runner(yadm_cmd("encrypt"), env=archive_setup.env).success
+    archive_setup.config("yadm.archive-format", "tar")
+    assert runner(yadm_cmd("encrypt"), env=archive_setup.env).success
+    assert not archive_setup.objects.exists()
+
+
+@pytest.mark.parametrize("archive_format", ["tar", "objects"])
+@pytest.mark.parametrize("compression", ["gzip", "zstd:19", "xz:1", "none"])
+def test_compression(runner, yadm_cmd, paths, archive_setup, encrypt_targets, archive_format, compression):
+    """Test compression of the archive"""
+
+    archive_setup.config("yadm.archive-format", archive_format)
+    archive_setup.config("yadm.archive-compression", compression)
+    codec = compression.split(":")[0]
+
+    run = runner(yadm_cmd("encrypt"), env=archive_setup.env)
+    assert run.success
+
+    # the compression is recorded in the archive
+    header = paths.archive.read_binary().split(b"\n")[:2]
+    if codec == "none" and archive_format == "tar":
+        assert not header[0].startswith(b"yadm-archive")
+    elif codec == "none":
+        assert b"compression" not in paths.archive.read_binary()
+    else:
+        assert header[0] == f"yadm-archive {archive_format}".encode()
+        assert header[1] == f"compression {codec}".encode()
+
+    # decrypt uses the recorded compression, whatever is configured
+    archive_setup.config("yadm.archive-compression", "none")
+    for filename in encrypt_targets:
+        paths.work.join(filename).remove()
+    run = runner(yadm_cmd("decrypt"), env=archive_setup.env)
+    assert run.success
+    for filename in encrypt_targets:
+        assert paths.work.join(filename).read() == filename.split("/")[-1]
+
+
+@pytest.mark.usefixtures("encrypt_targets")
+def test_unknown_compression(runner, yadm_cmd):
+    """Test an unknown compression"""
+    os.system(" ".join(yadm_cmd("config", "yadm.archive-compression", "lzma")))
+    run = runner(yadm_cmd("encrypt"))
+    assert run.failure
+    assert "Unknown compression 'lzma'" in run.err
+
+
+@pytest.mark.parametrize("archive_format", ["tar", "objects"])
+def test_encrypt_unchanged(runner, yadm_cmd, paths, archive_setup, encrypt_targets, archive_format):
+    """Test skipping encryption when nothing changed"""
+
+    archive_setup.config("yadm.archive-format", archive_format)
+    # gpg cannot be run if encryption is skipped
+    no_gpg = dict(archive_setup.env)
+    no_gpg["PATH"] = f'{paths.root.join("bin")}:{os.environ["PATH"]}'
+    paths.root.join("bin/gpg").write("#!/bin/sh\nexit 1\n", ensure=True)
+    paths.root.join("bin/gpg").chmod(0o755)
+
+    assert runner(yadm_cmd("encrypt"), env=archive_setup.env).success
+    archive = paths.archive.read_binary()
+    # the manifest holds hashes of the encrypted files
+    manifest = paths.archive.dirpath().join("encrypt-manifest")
+    assert oct(manifest.stat().mode & 0o777) == oct(0o600)
+
+    run = runner(yadm_cmd("encrypt"), env=no_gpg)
+    assert run.success
+    assert "The encrypted files are unchanged" in run.out
+    assert paths.archive.read_binary() == archive
+
+    # changing a file, a setting or forcing encrypts again
+    for change in ["file", "setting", "-f", "--force"]:
+        args = []
+        if change == "file":
+            paths.work.join(encrypt_targets[0]).write("changed")
+        elif change == "setting":
+            archive_setup.config("yadm.archive-compression", "gzip")
+        else:
+            args = [change]
+        run = runner(yadm_cmd("encrypt", *args), env=no_gpg)
+        assert run.failure, change
+        run = runner(yadm_cmd("encrypt", *args), env=archive_setup.env)
+        assert run.success
+        assert "The encrypted files are unchanged" not in run.out
+
+
+def test_encrypted_status(runner, yadm_cmd, paths, archive_setup, encrypt_targets):
+    """Test the status of encrypted files"""
+
+    hashes = paths.archive.dirpath().join("encrypt-hashes")
+
+    run = runner(yadm_cmd("status", "--encrypted"))
+    assert run.success
+    for filename in ["inc file1", "globs file1", "extest/inglob1"]:
+        assert f"\tnew file:   {filename}\n" in run.out
+
+    assert runner(yadm_cmd("encrypt"), env=archive_setup.env).success
+    run = runner(yadm_cmd("status", "--encrypted"))
+    assert run.success
+    assert run.out == "Encrypted files are unchanged since the last encrypt.\n"
+
+    # a file with unchanged stats isn't hashed again
+    old = time.time() - 100
+    for filename in encrypt_targets:
+        os.utime(paths.work.join(filename), (old, old))
+    assert runner(yadm_cmd("status", "--encrypted")).success
+    assert "inc file1" in hashes.read_binary().decode()
+    assert oct(hashes.stat().mode & 0o777) == oct(0o600)
+    cached = hashes.read_binary()
+    stale = cached.replace(cached.split(b"\0")[cached.split(b"\0").index(b"inc file1") + 2], b"0" * 40)
+    hashes.write_binary(stale)
+    run = runner(yadm_cmd("status", "--encrypted"))
+    assert "\tmodified:   inc file1\n" in run.out
+
+    # changing the file changes its stats, so it is hashed again
+    paths.work.join("inc file1").write("changed")
+    os.utime(paths.work.join("inc file1"), (old, old + 1))
+    paths.work.join("extest/inglob1").remove()
+    run = runner(yadm_cmd("status", "--encrypted"))
+    assert run.success
+    assert "\tmodified:   inc file1\n" in run.out
+    assert "\tdeleted:    extest/inglob1\n" in run.out
+    assert "globs file1" not in run.out
+
+
+def test_encrypt_many_files(runner, yadm_cmd, paths, archive_setup):
+    """Test encrypting more files than fit in a command line
+
+    The command line limit is derived from the stack size, which is lowered
+    so that a moderate number of files exceeds it.
+    """
+
+    os.system(" ".join(yadm_cmd("init", "-w", str(paths.work), "-f")))
+    limited = ["ulimit", "-s", "512", "&&"]
+    arg_max = int(runner([*limited, "getconf", "ARG_MAX"], shell=True).out)
+    count = 1500
+    many = paths.work.mkdir("many")
+    names = [f"many/{index:04}-{'long-name' * 10}" for index in range(count)]
+    for name in names:
+        with open(paths.work.join(name), "w", encoding="utf-8") as target:
+            target.write(name)
+    assert sum(len(name) + 1 for name in names) > arg_max
+    paths.encrypt.write("many/*\n")
+
+    encrypt = [*limited, *[shlex.quote(str(arg)) for arg in yadm_cmd("encrypt")]]
+    run = runner(encrypt, env=archive_setup.env, shell=True)
+    assert run.success
+    assert "Argument list too long" not in run.err
+    assert paths.archive.isfile()
+
+    many.remove()
+    decrypt = [*limited, *[shlex.quote(str(arg)) for arg in yadm_cmd("decrypt")]]
+    run = runner(decrypt, env=archive_setup.env, shell=True)
+    assert run.success
+    assert sorted(f"many/{path.basename}" for path in many.listdir()) == names
+    assert paths.work.join(names[-1]).read() == names[-1]
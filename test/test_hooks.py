@@ -164,3 +164,27 @@ def create_hook(paths, name, code):
     hook = paths.hooks.join(name)
     hook.write("#!/bin/sh\n" f"echo HOOK:{name}\n" f"exit {code}\n")
     hook.chmod(0o755)
+
+
+def test_encrypt_include_list(runner, paths, tmpdir):
+    """The list of encrypted files is also given NUL terminated"""
+
+    cmd = "passthrucmd"
+    hook = paths.hooks.join(f"post_{cmd}")
+    hook.write('#!/bin/bash\ntr "\\0" "|" < "$YADM_ENCRYPT_INCLUDE_LIST"\n', ensure=True)
+    hook.chmod(0o755)
+
+    data = tmpdir.mkdir("data")
+    script = f"""
+        YADM_TEST=1 source {paths.pgm}
+        YADM_HOOKS="{paths.hooks}"
+        YADM_DATA="{data}"
+        HOOK_COMMAND="{cmd}"
+        ENCRYPT_INCLUDE_FILES=(a $'new\\nline' c)
+        invoke_hook "post"
+    """
+    run = runner(command=["bash"], inp=script)
+    assert run.success
+    assert run.err == ""
+    assert run.out == "a|new\nline|c|"
+    assert data.listdir() == []
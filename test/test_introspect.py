@@ -12,6 +12,7 @@ import pytest
         "configs",
         "repo",
         "switches",
+        "system",
     ],
 )
 def test_introspect_category(runner, yadm_cmd, paths, name, supported_commands, supported_configs, supported_switches):
@@ -37,6 +38,14 @@ def test_introspect_category(runner, yadm_cmd, paths, name, supported_commands,
         assert run.out == ""
     if name == "repo":
         assert run.out.rstrip() == paths.repo
+    if name == "system":
+        assert [line.split(" ")[0] for line in run.out.splitlines()] == [
+            "arch",
+            "hostname",
+            "user",
+            "distro",
+            "distro_family",
+        ]
 
     # make sure every expected value is present
     for value in expected:
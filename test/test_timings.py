@@ -0,0 +1,74 @@
+"""Test timings"""
+
+import json
+
+import pytest
+
+PHASES = [
+    "process_global_args",
+    "set_operating_system",
+    "configure_paths",
+    "config_snapshot",
+    "require_git",
+    "pre-hook",
+    "command",
+    "auto_alt",
+    "auto_perms",
+    "auto_bootstrap",
+    "post-hook",
+]
+
+
+@pytest.mark.usefixtures("ds1_repo_copy")
+def test_timings_stderr(runner, yadm_cmd):
+    """--timings reports every phase to stderr"""
+    run = runner(yadm_cmd("--timings", "status"))
+    assert run.success
+    assert run.err.startswith("yadm timings (status)\n")
+    lines = run.err.splitlines()[1:]
+    assert [line.split()[0] for line in lines] == PHASES + ["total"]
+    for line in lines:
+        assert line.endswith(" ms")
+    assert "--timings" not in run.out
+
+
+@pytest.mark.usefixtures("ds1_repo_copy")
+@pytest.mark.parametrize("source", ["switch", "env"])
+def test_timings_json(runner, yadm_cmd, tmpdir, source):
+    """Timings are written as JSON to a file"""
+    report = tmpdir.join("timings.json")
+    env = {}
+    if source == "switch":
+        cmd = yadm_cmd("--timings-json", str(report), "status")
+    else:
+        cmd = yadm_cmd("status")
+        env["YADM_TIMINGS"] = str(report)
+    run = runner(cmd, env=env)
+    assert run.success
+    assert run.err == ""
+
+    timings = json.loads(report.read())
+    assert timings["command"] == "status"
+    assert [phase["phase"] for phase in timings["phases"]] == PHASES
+    assert all(phase["ms"] >= 0 for phase in timings["phases"])
+    total = sum(phase["ms"] for phase in timings["phases"])
+    assert timings["total_ms"] == pytest.approx(total, abs=0.01)
+
+
+def test_timings_exit(runner, yadm_cmd, paths):
+    """A phase ended by an exit is still reported"""
+    hook = paths.hooks.join("pre_status")
+    hook.write("#!/bin/sh\nexit 5\n")
+    hook.chmod(0o755)
+    run = runner(yadm_cmd("--timings", "status"))
+    assert run.code == 5
+    lines = run.err.splitlines()
+    assert lines[-2].split()[0] == "pre-hook"
+    assert lines[-1].split()[0] == "total"
+
+
+def test_timings_off(runner, yadm_cmd):
+    """No timings are reported unless requested"""
+    run = runner(yadm_cmd("version"))
+    assert run.success
+    assert "timings" not in run.err
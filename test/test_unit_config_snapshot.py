@@ -0,0 +1,89 @@
+"""Unit tests: config_snapshot"""
+
+import pytest
+
+CONFIG = """
+[yadm]
+\tflag
+\tempty =
+\tyes = YES
+\tnum = 10k
+\tzero = 0
+\tbad = maybe
+\tCamelCase = on
+\tmulti = a
+\tmulti = b
+[local]
+\tclass = ignored
+"""
+KEYS = [
+    "yadm.flag",
+    "yadm.empty",
+    "yadm.yes",
+    "yadm.num",
+    "yadm.zero",
+    "yadm.bad",
+    "yadm.camelcase",
+    "yadm.multi",
+    "yadm.missing",
+    "local.class",
+    "local.arch",
+]
+
+
+@pytest.mark.parametrize("lookup", ["", "--bool", "--get-all"])
+def test_config_snapshot(runner, yadm, tmpdir, lookup):
+    """Lookups answered by the snapshot match Git"""
+
+    config_file = tmpdir.join("config")
+    config_file.write(CONFIG)
+    repo = tmpdir.join("repo")
+    assert runner(command=["git", "init", "--bare", "-q", str(repo)]).success
+    for value in ["one", "two words"]:
+        assert runner(command=["git", f"--git-dir={repo}", "config", "--add", "local.class", value]).success
+
+    keys = [key for key in KEYS if not (lookup == "--bool" and key in ("yadm.multi", "local.class"))]
+    script = f"""
+        YADM_TEST=1 source {yadm}
+        YADM_CONFIG={config_file}
+        YADM_REPO={repo}
+        export GIT_DIR={repo}
+        function lookups() {{
+          for key in {" ".join(keys)}; do
+            printf '%s [%s] %s\\n' "$key" "$(config {lookup} "$key" 2>&1)" "$?"
+          done
+        }}
+        lookups
+        echo "---"
+        config_snapshot
+        GIT_PROGRAM=false
+        lookups
+    """
+    run = runner(command=["bash"], inp=script)
+    assert run.success
+    assert run.err == ""
+    from_git, from_snapshot = run.out.split("---\n")
+    assert from_snapshot == from_git
+    assert "local.class [ignored]" not in from_snapshot
+
+
+def test_config_command(runner, yadm, tmpdir):
+    """The config command uses Git, and refreshes the snapshot"""
+
+    config_file = tmpdir.join("config")
+    config_file.write("[yadm]\n\tauto-alt = false\n")
+
+    script = f"""
+        YADM_TEST=1 source {yadm}
+        YADM_CONFIG={config_file}
+        YADM_REPO={tmpdir}/missing
+        function main() {{ config "$@"; }}
+        config_snapshot
+        main yadm.auto-alt true
+        config --bool yadm.auto-alt
+    """
+    run = runner(command=["bash"], inp=script)
+    assert run.success
+    assert run.err == ""
+    assert run.out == "true\n"
+    assert "auto-alt = true" in config_file.read()
@@ -1,7 +1,17 @@
 """Unit tests: exclude_encrypted"""
 
+import hashlib
+
 import pytest
 
+HEADER = "# yadm-auto-excludes\n# This section is managed by yadm.\n# Any edits below will be lost.\n"
+
+
+def digest_line(data):
+    """Return the line recording the digest of encrypt data"""
+    digest = hashlib.sha1(f"blob {len(data)}\0{data}".encode()).hexdigest()
+    return f"# encrypt digest: {digest}\n"
+
 
 @pytest.mark.parametrize("exclude", ["missing", "outdated", "up-to-date"])
 @pytest.mark.parametrize("encrypt_exists", [True, False], ids=["encrypt", "no-encrypt"])
@@ -9,7 +19,7 @@ import pytest
 def test_exclude_encrypted(runner, tmpdir, yadm, encrypt_exists, auto_exclude, exclude):
     """Test exclude_encrypted()"""
 
-    header = "# yadm-auto-excludes\n# This section is managed by yadm.\n# Any edits below will be lost.\n"
+    header = HEADER + digest_line("test-encrypt-data\n")
 
     config_function = 'function config() { echo "false";}'
     if auto_exclude:
@@ -22,7 +32,7 @@ def test_exclude_encrypted(runner, tmpdir, yadm, encrypt_exists, auto_exclude, e
     if encrypt_exists:
         encrypt_file.write("test-encrypt-data\n", ensure=True)
     if exclude == "outdated":
-        exclude_file.write(f"original-exclude\n{header}outdated\n", ensure=True)
+        exclude_file.write(f"original-exclude\n{HEADER}{digest_line('outdated')}outdated\n", ensure=True)
     elif exclude == "up-to-date":
         exclude_file.write(f"original-exclude\n{header}test-encrypt-data\n", ensure=True)
 
@@ -53,3 +63,54 @@ def test_exclude_encrypted(runner, tmpdir, yadm, encrypt_exists, auto_exclude, e
             assert run.out == ""
     else:
         assert run.out == ""
+
+
+@pytest.mark.parametrize("digest", ["none", "outdated", "current"])
+def test_digest(runner, tmpdir, yadm, digest):
+    """Test exclude_encrypted() only rewrites a section with another digest"""
+
+    encrypt_file = tmpdir.join("encrypt_file")
+    repo_dir = tmpdir.join("repodir")
+    exclude_file = repo_dir.join("info/exclude")
+    encrypt_file.write("test-encrypt-data\n", ensure=True)
+    recorded = {"none": "", "outdated": digest_line("outdated"), "current": digest_line("test-encrypt-data\n")}
+    exclude_file.write(f"original-exclude\n{HEADER}{recorded[digest]}test-encrypt-data\n", ensure=True)
+
+    script = f"""
+        YADM_TEST=1 source {yadm}
+        function config() {{ return; }}
+        DEBUG=1
+        YADM_ENCRYPT="{encrypt_file}"
+        YADM_REPO="{repo_dir}"
+        exclude_encrypted
+    """
+    run = runner(command=["bash"], inp=script)
+    assert run.success
+    assert run.err == ""
+    expected = "original-exclude\n" + HEADER + digest_line("test-encrypt-data\n") + "test-encrypt-data\n"
+    assert exclude_file.read() == expected
+    assert (f"Updating {exclude_file}" in run.out) == (digest != "current")
+
+
+def test_missing_newline(runner, tmpdir, yadm):
+    """Test exclude_encrypted() with an encrypt file missing its last newline"""
+
+    encrypt_file = tmpdir.join("encrypt_file")
+    repo_dir = tmpdir.join("repodir")
+    exclude_file = repo_dir.join("info/exclude")
+    encrypt_file.write("first\nlast", ensure=True)
+    exclude_file.write("unmanaged", ensure=True)
+
+    script = f"""
+        YADM_TEST=1 source {yadm}
+        function config() {{ return; }}
+        YADM_ENCRYPT="{encrypt_file}"
+        YADM_REPO="{repo_dir}"
+        exclude_encrypted
+    """
+    run = runner(command=["bash"], inp=script)
+    assert run.success
+    assert run.err == ""
+    expected = "unmanaged\n" + HEADER + digest_line("first\nlast") + "first\nlast\n"
+    assert exclude_file.read() == expected
+    assert not repo_dir.join("info").listdir(lambda path: path.basename != "exclude")
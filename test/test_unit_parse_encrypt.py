@@ -1,5 +1,7 @@
 """Unit tests: parse_encrypt"""
 
+import os
+
 import pytest
 
 
@@ -165,7 +167,109 @@ def test_file_parse_encrypt(runner, paths):
     assert sorted_expectations in run.out
 
 
-def run_parse_encrypt(runner, paths, skip_parse=False, twice=False):
+@pytest.mark.usefixtures("ds1_repo_copy")
+def test_prune(runner, paths):
+    """Test parse_encrypt with yadm.encrypt-prune
+
+    Pruned directories are not descended into by "**", but may still be
+    matched by other patterns.
+    """
+    paths.config.write("[yadm]\n\tencrypt-prune = node_modules cache/big\n")
+    paths.encrypt.write("**/*.key\ncache/**/*.txt\nkeep/node_modules/top.key\n")
+    paths.work.join("a/b.key").write("", ensure=True)
+    paths.work.join("a/node_modules/pkg/c.key").write("", ensure=True)
+    paths.work.join("cache/big/d.key").write("", ensure=True)
+    paths.work.join("cache/small/e.key").write("", ensure=True)
+    paths.work.join("cache/big/f.txt").write("", ensure=True)
+    paths.work.join("cache/small/g.txt").write("", ensure=True)
+    paths.work.join("keep/node_modules/top.key").write("", ensure=True)
+
+    run = run_parse_encrypt(runner, paths)
+    assert run.success
+    assert run.err == ""
+    assert "EIF_COUNT:4" in run.out
+    assert "EIF:a/b.key\nEIF:cache/small/e.key\nEIF:cache/small/g.txt\nEIF:keep/node_modules/top.key\n" in run.out
+
+
+@pytest.mark.usefixtures("ds1_repo_copy")
+def test_cache(runner, paths, tmpdir):
+    """Test parse_encrypt cache
+
+    The expansion is reused until the encrypt file, or one of the directories
+    the patterns read, changes.
+    """
+    data = tmpdir.mkdir("data")
+    cache = data.join("encrypt-cache")
+    paths.encrypt.write("dir/**/*.key\nfile.key\n")
+    paths.work.join("dir/sub/a.key").write("", ensure=True)
+
+    def age(mtime):
+        """Make the directories older than the run"""
+        for path in [paths.work, paths.work.join("dir"), paths.work.join("dir/sub")]:
+            os.utime(path, (mtime, mtime))
+
+    age(1000)
+    run = run_parse_encrypt(runner, paths, data=data)
+    assert run.success
+    assert run.err == ""
+    assert "EIF_COUNT:1" in run.out
+    assert cache.exists()
+
+    # an unchanged cache is used as is
+    cache_data = cache.read_binary()
+    cache.write_binary(cache_data.replace(b"dir/sub/a.key\0", b"dir/sub/cached.key\0"))
+    run = run_parse_encrypt(runner, paths, data=data)
+    assert "EIF:dir/sub/cached.key\n" in run.out
+
+    # new files in read directories invalidate it
+    paths.work.join("dir/sub/b.key").write("")
+    age(2000)
+    run = run_parse_encrypt(runner, paths, data=data)
+    assert "EIF_COUNT:2" in run.out
+    assert "EIF:dir/sub/a.key\nEIF:dir/sub/b.key\n" in run.out
+
+    # as do files checked by literal patterns
+    paths.work.join("file.key").write("")
+    age(3000)
+    run = run_parse_encrypt(runner, paths, data=data)
+    assert "EIF_COUNT:3" in run.out
+    assert "EIF:file.key\n" in run.out
+
+    # and changes to the encrypt file
+    paths.encrypt.write("dir/**/a.key\n")
+    run = run_parse_encrypt(runner, paths, data=data)
+    assert "EIF_COUNT:1" in run.out
+
+    # directories modified during the parse are not cached
+    cache.remove()
+    paths.work.join("dir/sub").setmtime()
+    run = run_parse_encrypt(runner, paths, data=data)
+    assert "EIF_COUNT:1" in run.out
+    assert not cache.exists()
+
+
+@pytest.mark.usefixtures("ds1_repo_copy")
+def test_many_excludes(runner, paths):
+    """Test parse_encrypt with many included and excluded files
+
+    Excludes are removed in a single pass, so this is quick even though every
+    include is checked against a large number of excludes.
+    """
+    inc = paths.work.mkdir("inc")
+    for index in range(20000):
+        inc.join(f"f{index:05}").write("")
+    paths.encrypt.write("inc/*\n!inc/f0[0-4]*\n")
+
+    run = run_parse_encrypt(runner, paths)
+    assert run.success
+    assert run.err == ""
+    assert "EIF_COUNT:15000" in run.out
+    assert "EIF:inc/f04999\n" not in run.out
+    assert "EIF:inc/f05000\nEIF:inc/f05001\n" in run.out
+    assert "EIF:inc/f19999\n" in run.out
+
+
+def run_parse_encrypt(runner, paths, skip_parse=False, twice=False, data=""):
     """Run parse_encrypt
 
     A count of ENCRYPT_INCLUDE_FILES will be reported as EIF_COUNT:X. All
@@ -185,6 +289,9 @@ def run_parse_encrypt(runner, paths, skip_parse=False, twice=False):
         export GIT_DIR
         YADM_WORK={paths.work}
         export YADM_WORK
+        YADM_CONFIG={paths.config}
+        YADM_DATA={data}
+        YADM_ENCRYPT_CACHE={data}/encrypt-cache
         {parse_cmd}
         export ENCRYPT_INCLUDE_FILES
         export PARSE_ENCRYPT_SHORT
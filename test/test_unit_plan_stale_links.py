@@ -0,0 +1,68 @@
+"""Unit tests: plan_stale_links"""
+
+import os
+
+import pytest
+
+
+@pytest.mark.parametrize("planned", [True, False])
+@pytest.mark.parametrize("linked", [True, False])
+@pytest.mark.parametrize("kind", ["file", "symlink"])
+def test_plan_stale_links(runner, yadm, tmpdir, kind, linked, planned):
+    """Test plan_stale_links()"""
+
+    source_file = tmpdir.join("source_file")
+    source_file.write("source file", ensure=True)
+    link = tmpdir.join("link")
+
+    if kind == "file":
+        link.write("link file", ensure=True)
+    else:
+        os.system(f"ln -s {source_file} {link}")
+
+    alt_linked = ""
+    if linked:
+        alt_linked = f"[{source_file}]=1"
+
+    script = f"""
+        YADM_TEST=1 source {yadm}
+        possible_alts=({link})
+        declare -A alt_linked=({alt_linked})
+        declare -A planned=({f'[{link}]=1' if planned else ''})
+        function plan_action() {{ echo "$@"; }}
+        plan_stale_links
+    """
+
+    run = runner(command=["bash"], inp=script)
+    assert run.err == ""
+    if kind == "symlink" and not linked and not planned:
+        assert run.out == f"remove {link}\n"
+    else:
+        assert run.out == ""
+
+
+@pytest.mark.parametrize("printf", [True, False], ids=["find", "readlink"])
+def test_many_links(runner, yadm, tmpdir, printf):
+    """Links are read by a single find, or by readlink if find lacks -printf"""
+
+    source_file = tmpdir.join("source_file")
+    source_file.write("source file", ensure=True)
+    links = []
+    for index in range(500):
+        link = tmpdir.join(f"link{index}")
+        os.symlink(f"source{index % 2 or ''}_file", link)
+        links.append(str(link))
+
+    script = f"""
+        YADM_TEST=1 source {yadm}
+        possible_alts=({" ".join(links)})
+        declare -A alt_linked=([source_file]=1)
+        declare -A planned=()
+        function plan_action() {{ echo "$@"; }}
+        {"function readlink() { echo called >&2; }" if printf else "function find() { return 1; }"}
+        plan_stale_links
+    """
+
+    run = runner(command=["bash"], inp=script)
+    assert run.err == ""
+    assert run.out == "".join(f"remove {link}\n" for link in links[1::2])
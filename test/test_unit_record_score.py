@@ -8,17 +8,23 @@ INIT_VARS = """
     local_system=testsystem
     local_host=testhost
     local_user=testuser
-    alt_scores=()
-    alt_targets=()
-    alt_sources=()
-    alt_template_cmds=()
+    declare -a alt_targets=()
+    declare -A alt_scores=()
+    declare -A alt_sources=()
+    declare -A alt_template_cmds=()
 """
 
 REPORT_RESULTS = """
-    echo "SIZE:${#alt_scores[@]}"
-    echo "SCORES:${alt_scores[@]}"
+    scores=()
+    sources=()
+    for tgt in "${alt_targets[@]}"; do
+        scores+=("${alt_scores[$tgt]}")
+        [ "${alt_sources[$tgt]+isset}" ] && sources+=("${alt_sources[$tgt]}")
+    done
+    echo "SIZE:${#scores[@]}"
+    echo "SCORES:${scores[@]}"
     echo "TARGETS:${alt_targets[@]}"
-    echo "SOURCES:${alt_sources[@]}"
+    echo "SOURCES:${sources[@]}"
 """
 
 
@@ -78,9 +84,9 @@ def test_existing_scores(runner, yadm, difference):
     script = f"""
         YADM_TEST=1 source {yadm}
         {INIT_VARS}
-        alt_scores=(2)
+        alt_scores=([testtgt]=2)
         alt_targets=("testtgt")
-        alt_sources=("existing_src")
+        alt_sources=([testtgt]="existing_src")
         record_score "{score}" "testtgt" "new_src"
         {REPORT_RESULTS}
     """
@@ -99,10 +105,9 @@ def test_existing_template(runner, yadm):
     script = f"""
         YADM_TEST=1 source {yadm}
         {INIT_VARS}
-        alt_scores=(1)
+        alt_scores=([testtgt]=1)
         alt_targets=("testtgt")
-        alt_sources=()
-        alt_template_cmds=("existing_template")
+        alt_template_cmds=([testtgt]="existing_template")
         record_score "2" "testtgt" "new_src"
         {REPORT_RESULTS}
     """
@@ -129,14 +134,14 @@ def test_config_first(runner, yadm):
         record_score "3" "tgt_after"  "src_after"
         {REPORT_RESULTS}
         echo "CMD_VALUE:${{alt_template_cmds[@]}}"
-        echo "CMD_INDEX:${{!alt_template_cmds[@]}}"
+        echo "CMD_TARGET:${{!alt_template_cmds[@]}}"
     """
     run = runner(command=["bash"], inp=script)
     assert run.success
     assert run.err == ""
-    assert "SIZE:3\n" in run.out
-    assert "SCORES:2 1 3\n" in run.out
+    assert "SIZE:4\n" in run.out
+    assert "SCORES:2 1 0 3\n" in run.out
     assert f"TARGETS:{config} tgt_before tgt_tmp tgt_after\n" in run.out
     assert "SOURCES:src_config src_before src_tmp src_after\n" in run.out
     assert "CMD_VALUE:cmd_tmp\n" in run.out
-    assert "CMD_INDEX:2\n" in run.out
+    assert "CMD_TARGET:tgt_tmp\n" in run.out
@@ -1,16 +1,23 @@
 """Unit tests: record_template"""
 
 INIT_VARS = """
-    alt_targets=()
-    alt_template_cmds=()
-    alt_sources=()
+    declare -a alt_targets=()
+    declare -A alt_scores=()
+    declare -A alt_template_cmds=()
+    declare -A alt_sources=()
 """
 
 REPORT_RESULTS = """
+    cmds=()
+    sources=()
+    for tgt in "${alt_targets[@]}"; do
+        cmds+=("${alt_template_cmds[$tgt]}")
+        sources+=("${alt_sources[$tgt]}")
+    done
     echo "SIZE:${#alt_targets[@]}"
     echo "TARGETS:${alt_targets[@]}"
-    echo "CMDS:${alt_template_cmds[@]}"
-    echo "SOURCES:${alt_sources[@]}"
+    echo "CMDS:${cmds[@]}"
+    echo "SOURCES:${sources[@]}"
 """
 
 
@@ -41,8 +48,9 @@ def test_existing_template(runner, yadm):
         YADM_TEST=1 source {yadm}
         {INIT_VARS}
         alt_targets=("testtgt")
-        alt_template_cmds=("existing_cmd")
-        alt_sources=("existing_src")
+        alt_scores=([testtgt]=0)
+        alt_template_cmds=([testtgt]="existing_cmd")
+        alt_sources=([testtgt]="existing_src")
         record_template "testtgt" "new_cmd" "new_src"
         {REPORT_RESULTS}
     """
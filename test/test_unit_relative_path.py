@@ -1,5 +1,8 @@
 """Unit tests: relative_path"""
 
+import os
+import random
+
 import pytest
 
 
@@ -30,3 +33,32 @@ def test_relative_path(runner, paths, base, full_path, expected):
     assert run.success
     assert run.err == ""
     assert run.out.strip() == expected
+
+
+def test_relpath_property(runner, paths):
+    """Compare random paths with os.path.relpath"""
+
+    rng = random.Random(8)
+    names = ["a", "b", "ab", "a b", "*", "[b]", "c.d", "-"]
+
+    def random_path(relative):
+        parts = [rng.choice(names) for _ in range(rng.randint(0 if not relative else 1, 5))]
+        return ("" if relative else "/") + "/".join(parts)
+
+    cases = []
+    for _ in range(300):
+        relative = rng.random() < 0.1
+        cases.append((random_path(relative), random_path(relative)))
+
+    script = f"YADM_TEST=1 source {paths.pgm}\n"
+    for base, full_path in cases:
+        script += f"relative_path '{base}' '{full_path}' result; printf '%s\\0' \"$result\"\n"
+
+    run = runner(command=["bash"], inp=script)
+    assert run.success
+    assert run.err == ""
+    results = run.out.split("\0")[:-1]
+    assert len(results) == len(cases)
+    for (base, full_path), result in zip(cases, results):
+        expected = os.path.relpath(full_path, base)
+        assert result == ("" if expected == "." else expected), (base, full_path)
@@ -0,0 +1,134 @@
+"""Unit tests: render_templates"""
+
+import sys
+
+import pytest
+
+
+@pytest.mark.parametrize("jobs", ["1", "3"])
+def test_render_templates(runner, yadm, tmpdir, jobs):
+    """Templates are reported in order, regardless of concurrency"""
+
+    script = f"""
+        YADM_TEST=1 source {yadm}
+        YADM_DATA={tmpdir}
+        function config() {{ echo "{jobs}"; }}
+        function template_cache_store() {{ echo "stored $1"; }}
+        function template_test() {{
+          sleep "0.$(( 3 - ${{#1}} ))"
+          echo "processed $1 to $2"
+          echo "error $1" >&2
+          [ "$1" != "bb" ]
+        }}
+        alt_failed=0
+        render_templates template_test a A template_test bb BB template_test c C
+        echo "FAILED:$alt_failed"
+    """
+    run = runner(command=["bash"], inp=script)
+    assert run.success
+    assert run.out == (
+        "processed a to A\n" "stored a\n" "processed bb to BB\n" "processed c to C\n" "stored c\n" "FAILED:1\n"
+    )
+    assert run.err == "error a\nerror bb\nerror c\n"
+    assert tmpdir.listdir() == []
+
+
+def test_config_first(runner, yadm, tmpdir):
+    """YADM_CONFIG is processed before other templates start"""
+
+    script = f"""
+        YADM_TEST=1 source {yadm}
+        YADM_DATA={tmpdir}
+        YADM_CONFIG=config_output
+        function config() {{ echo "4"; }}
+        function template_cache_store() {{ :; }}
+        function template_config() {{ sleep 0.2; echo "config done" >> {tmpdir}/log; }}
+        function template_other() {{ echo "other $1" >> {tmpdir}/log; }}
+        alt_failed=0
+        render_templates template_config in config_output template_other a A template_other b B
+        sort {tmpdir}/log | tr '\\n' ' '
+        echo
+        head -1 {tmpdir}/log
+    """
+    run = runner(command=["bash"], inp=script)
+    assert run.success
+    assert run.err == ""
+    assert run.out == "config done other a other b \nconfig done\n"
+
+
+def processor_script(tmpdir, processor):
+    """Create a Python script for processor, like those installed by pip"""
+    pytest.importorskip(processor)
+    script = tmpdir.join(f"bin/{processor}")
+    script.write(
+        f"#!{sys.executable}\n"
+        "import sys\n"
+        f"from {processor} import main\n"
+        "if __name__ == '__main__':\n"
+        "    sys.exit(main())\n",
+        ensure=True,
+    )
+    script.chmod(0o755)
+    return script
+
+
+@pytest.mark.parametrize("processor", ["j2cli", "envtpl"])
+@pytest.mark.parametrize("renderer", ["true", "false"])
+def test_renderer(runner, yadm, tmpdir, processor, renderer):
+    """The persistent renderer produces the same output as individual processes"""
+
+    script_path = processor_script(tmpdir, processor)
+    tmpdir.join("good").write('{{YADM_CLASS}}|{{YADM_SOURCE}}|{{YADM_CLASSES.split("\\n")}}\n\u00e9\n\n\n')
+    tmpdir.join("bad").write("{% if %}\n")
+
+    script = f"""
+        YADM_TEST=1 source {yadm}
+        YADM_DATA={tmpdir}
+        J2CLI_PROGRAM={script_path}
+        ENVTPL_PROGRAM={script_path}
+        function config() {{ [ "$1" = "--bool" ] && echo "{renderer}" || echo 1; }}
+        function template_cache_store() {{ echo "stored $1"; }}
+        local_class="cls"
+        local_classes=("one" "two words")
+        alt_failed=0
+        cd {tmpdir}
+        render_templates template_{processor} good out1 template_{processor} bad out2 template_{processor} good out3
+        echo "FAILED:$alt_failed"
+    """
+    run = runner(command=["bash"], inp=script)
+    assert run.success
+    assert run.out == "stored good\nstored good\nFAILED:1\n"
+    assert run.err.count("Error") + run.err.count("Exception") > 0
+    assert tmpdir.join("out1").read() == "cls|good|['one', 'two words']\n\u00e9\n"
+    assert tmpdir.join("out3").read() == tmpdir.join("out1").read()
+    assert not tmpdir.join("out2").exists()
+
+
+def test_renderer_failure(runner, yadm, tmpdir):
+    """Templates are processed individually if the renderer exits"""
+
+    script_path = processor_script(tmpdir, "j2cli")
+    tmpdir.join("good").write("{{YADM_SOURCE}}\n")
+
+    script = f"""
+        YADM_TEST=1 source {yadm}
+        J2CLI_PROGRAM={script_path}
+        function config() {{ [ "$1" = "--bool" ] && echo "true" || echo 1; }}
+        function template_cache_store() {{ echo "stored $1"; }}
+        function renderer_start() {{
+          coproc YADM_RENDERER {{ true; }}
+          renderer_in="${{YADM_RENDERER[1]}}"
+          renderer_out="${{YADM_RENDERER[0]}}"
+          renderer_pid="$YADM_RENDERER_PID"
+        }}
+        function template_j2cli() {{ echo "individual $1"; move_file "$1" "$2" "$1" 0; }}
+        alt_failed=0
+        cd {tmpdir}
+        render_templates template_j2cli good out1 template_j2cli good out2
+        echo "FAILED:$alt_failed"
+    """
+    run = runner(command=["bash"], inp=script)
+    assert run.success
+    assert run.err == ""
+    assert run.out == "individual good\nstored good\nindividual good\nstored good\nFAILED:0\n"
+    assert tmpdir.join("out2").read() == "good\n"
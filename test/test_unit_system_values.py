@@ -0,0 +1,59 @@
+"""Unit tests: system_values"""
+
+
+def test_system_values(runner, yadm, tmpdir):
+    """System values are cached until the host, machine or os-release change"""
+
+    os_release = tmpdir.join("os-release")
+    os_release.write("ID=first\nID_LIKE=family\n")
+    data = tmpdir.mkdir("data")
+
+    script = f"""
+        YADM_TEST=1 source {yadm}
+        YADM_DATA={data}
+        OS_RELEASE={os_release}
+        LSB_RELEASE_PROGRAM=missing_lsb_release
+        configure_paths
+        function uname() {{ echo "uname $1" >&2; [ "$1" = "-n" ] && echo "host.domain" || echo "arch"; }}
+        function id() {{ echo "id" >&2; echo "user"; }}
+        function show() {{
+          local system_arch system_host system_user system_distro system_distro_family
+          system_values
+          echo "$system_arch $system_host $system_user $system_distro $system_distro_family"
+        }}
+        show
+        show
+        echo "ID=second" > {os_release}
+        show
+        HOSTNAME=other
+        show
+        HOSTTYPE=other
+        show
+    """
+    run = runner(command=["bash"], inp=script)
+    assert run.success
+    assert run.out == (
+        "arch host user first family\n"
+        "arch host user first family\n"
+        "arch host user second \n"
+        "arch host user second \n"
+        "arch host user second \n"
+    )
+    assert run.err == "uname -m\nuname -n\nid\n" * 4
+    assert data.join("system-cache").isfile()
+
+
+def test_no_data_dir(runner, yadm, tmpdir):
+    """Nothing is cached without a data directory"""
+
+    script = f"""
+        YADM_TEST=1 source {yadm}
+        cd {tmpdir}
+        system_values
+        echo "$system_user"
+    """
+    run = runner(command=["bash"], inp=script)
+    assert run.success
+    assert run.err == ""
+    assert run.out.strip()
+    assert tmpdir.listdir() == []
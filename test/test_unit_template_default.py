@@ -261,3 +261,36 @@ def test_env(runner, yadm, tmpdir):
     assert run.success
     assert run.err == ""
     assert output_file.read().strip() == os.environ["PWD"]
+
+
+def test_batch(runner, yadm, tmpdir):
+    """Test processing multiple templates at once"""
+
+    first_input = tmpdir.join("first")
+    first_input.write('{{yadm.source}}\n{% if yadm.os == "batch" %}\nunterminated', ensure=True)
+    second_input = tmpdir.join("dir").join("second")
+    second_input.write("{{yadm.source}}\n{% include missing %}", ensure=True)
+    third_input = tmpdir.join("third")
+    third_input.write("{{yadm.os}}", ensure=True)
+    first_output = tmpdir.join("first.out")
+    second_output = tmpdir.join("second.out")
+    third_output = tmpdir.join("third.out")
+
+    script = f"""
+        YADM_TEST=1 source {yadm}
+        set_awk
+        local_system="batch"
+        DEBUG=YES
+        template_default "{first_input}" "{first_output}" \\
+                         "{second_input}" "{second_output}" \\
+                         "{third_input}" "{third_output}"
+    """
+    run = runner(command=["bash"], inp=script)
+    assert run.failure
+    assert f"could not read '{tmpdir.join('dir').join('missing')}'" in run.err
+    assert f"Failed to process template {second_input}" in run.out
+    assert f"Failed to process template {first_input}" not in run.out
+    assert first_output.read() == f"{first_input}\nunterminated\n"
+    assert second_output.read() == f"{second_input}\n"
+    assert third_output.read() == "batch\n"
+    assert sorted(os.listdir(tmpdir)) == sorted(["dir", "first", "first.out", "second.out", "third", "third.out"])